@@ -8,10 +8,33 @@ from tkinter import messagebox  # Import messagebox for error dialogs
 import mainfuncs as mf # These are localized functions I wanted seperate to maintain fascade of being clean
 import os  # Import os to handle file opening
 import logging
+import queue
+import threading
 
 logger = logging.getLogger(__name__)
 app_manager = None
 
+# Resolved once at import rather than on every window open
+_EXCEL_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'excels'))
+
+# Files in the excels folder that belong to the application rather than being Quote Master files
+_EXCLUDED = frozenset({"parts_sandbox.xlsx", "parts_sandbox.db", "parts_sandbox"})
+
+# Folder listing cache: folder path -> (directory mtime_ns, file names, {file name: file path})
+_listing_cache = {}
+
+# The open Quote Master Files window, reused instead of rebuilt on repeated clicks
+_file_window = None
+
+# Rescans the folder into the open Quote Master Files window, set while the window is open
+_rescan_file_window = None
+
+# Number of files handed to the Listbox per insert
+_SCAN_BATCH_SIZE = 200
+
+# How often the UI thread checks for results from worker threads
+_POLL_MS = 50
+
 def start_application(manager):
     """
     Initializes and starts the main application window.
@@ -36,7 +59,6 @@ def start_application(manager):
     list_button = tk.Button(main_window, text="Analysis Mode", command=mf.analysis_loop, font=("Arial", 12))
     list_button.pack(pady=10) 
 
-    list_button = tk.Button(main_window, text="EAU Forecast", command=lambda: print("dummy"), font=("Arial", 12))
     list_button = tk.Button(main_window, text="EAU Forecast", command=lambda: print("dummy"), font=("Arial", 12))
     list_button.pack(pady=10)
 
@@ -51,38 +73,122 @@ def start_application(manager):
     # Start the Tkinter event loop
     main_window.mainloop()
 
+def scan_excel_folder(excel_folder):
+    '''
+    Returns the Quote Master file names in the given folder, along with a dict mapping each name to its path.
+    The listing is cached and only rescanned when the folder's mtime changes.
+    '''
+    mtime = os.stat(excel_folder).st_mtime_ns
+    cached = _listing_cache.get(excel_folder)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    # scandir's DirEntry caches the file type, so no extra stat per entry
+    with os.scandir(excel_folder) as it:
+        path_by_name = {
+            entry.name: entry.path
+            for entry in it
+            if entry.is_file() and entry.name not in _EXCLUDED
+        }
+    names = list(path_by_name)
+    _listing_cache[excel_folder] = (mtime, names, path_by_name)
+    return names, path_by_name
+
 def list_files():
     '''
     This function will list all the files in the "excel" folder in the GUI.
     '''
-    logger.info("Opening Quote Master Files window")
-    excel_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'excels'))
-
-    try:
-        quote_master_files = [
-            os.path.join(excel_folder, file)
-            for file in os.listdir(excel_folder)
-            if os.path.isfile(os.path.join(excel_folder, file)) and file != "parts_sandbox.xlsx"
-        ]
-        logger.debug(f"Found {len(quote_master_files)} Quote Master files")
-    except FileNotFoundError:
-        logger.error(f"Excel folder not found: {excel_folder}")
-        messagebox.showerror("Error", f"The folder '{excel_folder}' does not exist.")
+    global _file_window, _rescan_file_window
+    if _file_window is not None and _file_window.winfo_exists():
+        logger.info("Raising existing Quote Master Files window")
+        # Refresh All clears the listing cache, so the open window's list may be out of date
+        if _EXCEL_FOLDER not in _listing_cache:
+            _rescan_file_window()
+        _file_window.deiconify()
+        _file_window.lift()
         return
 
+    logger.info("Opening Quote Master Files window")
+
     file_window = tk.Toplevel()
     file_window.title("Quote Master Files")
     file_window.geometry("600x600")
+    _file_window = file_window
+
+    def close_window():
+        global _file_window, _rescan_file_window
+        _file_window = None
+        _rescan_file_window = None
+        file_window.destroy()
+
+    file_window.protocol("WM_DELETE_WINDOW", close_window)
 
     file_label = tk.Label(file_window, text="Quote Master Files:", font=("Arial", 12))
     file_label.pack(pady=10)
 
+    status_label = tk.Label(file_window, text="Loading...", font=("Arial", 10))
+
     # Create a Listbox to display the files
     file_listbox = tk.Listbox(file_window, font=("Arial", 10), width=50, height=15, selectmode=tk.SINGLE)
     file_listbox.pack(pady=10)
 
-    for file in quote_master_files:
-        file_listbox.insert(tk.END, file)
+    # The Listbox only holds file names, which keeps the strings pushed through Tcl short.
+    # Selections are resolved back to full paths here once the scan completes.
+    path_by_name = {}
+
+    # The folder is scanned on a worker thread so a slow disk or network share
+    # doesn't freeze the UI. The worker only touches the queue, never Tk.
+    # Each scan gets its own queue, and results from an earlier scan are dropped.
+    scan_results = None
+
+    def scan(results):
+        try:
+            names, paths = scan_excel_folder(_EXCEL_FOLDER)
+        except OSError as e:
+            results.put(e)
+            return
+        for start in range(0, len(names), _SCAN_BATCH_SIZE):
+            results.put(names[start:start + _SCAN_BATCH_SIZE])
+        # The name -> path map is sent last and marks the end of the scan
+        results.put(paths)
+
+    def poll_scan_results(results):
+        if not file_window.winfo_exists() or results is not scan_results:
+            return
+        try:
+            while True:
+                batch = results.get_nowait()
+                if isinstance(batch, FileNotFoundError):
+                    logger.error("Excel folder not found: %s", _EXCEL_FOLDER)
+                    messagebox.showerror("Error", f"The folder '{_EXCEL_FOLDER}' does not exist.")
+                    file_window.destroy()
+                    return
+                if isinstance(batch, OSError):
+                    logger.error("Could not read Excel folder %s: %s", _EXCEL_FOLDER, batch)
+                    messagebox.showerror("Error", f"Could not read the folder '{_EXCEL_FOLDER}': {batch}")
+                    file_window.destroy()
+                    return
+                if isinstance(batch, dict):
+                    path_by_name.update(batch)
+                    logger.debug("Found %d Quote Master files", len(path_by_name))
+                    status_label.pack_forget()
+                    return
+                # Insert each batch in a single Tcl call rather than one per file
+                file_listbox.insert(tk.END, *batch)
+        except queue.Empty:
+            file_window.after(_POLL_MS, poll_scan_results, results)
+
+    def start_scan():
+        nonlocal scan_results
+        scan_results = queue.Queue()
+        file_listbox.delete(0, tk.END)
+        path_by_name.clear()
+        status_label.pack(before=file_listbox)
+        threading.Thread(target=scan, args=(scan_results,), daemon=True).start()
+        poll_scan_results(scan_results)
+
+    _rescan_file_window = start_scan
+    start_scan()
 
     # Define a function to open the selected file
     def open_file(event=None):
@@ -91,12 +197,14 @@ def list_files():
             messagebox.showerror("Error", "Please select a file first")
             return
             
-        selected_file = file_listbox.get(file_listbox.curselection())
-        if os.path.exists(selected_file):
-            logger.info(f"Opening file: {selected_file}")
+        selected_name = file_listbox.get(file_listbox.curselection())
+        # The map only arrives at the end of the scan, so fall back to joining the path
+        selected_file = path_by_name.get(selected_name) or os.path.join(_EXCEL_FOLDER, selected_name)
+        try:
+            logger.info("Opening file: %s", selected_file)
             os.startfile(selected_file)
-        else:
-            logger.error(f"File not found: {selected_file}")
+        except FileNotFoundError:
+            logger.error("File not found: %s", selected_file)
             messagebox.showerror("Error", f"File not found: {selected_file}")
 
     def refresh_database():
@@ -104,6 +212,7 @@ def list_files():
             logger.info("Starting database refresh")
             # Use the global app_manager instance
             success = app_manager.refresh_all_files()
+            _listing_cache.pop(_EXCEL_FOLDER, None)
             if success:
                 logger.info("Database refresh completed successfully")
                 messagebox.showinfo("Success", "Database refreshed successfully with all Quote Master files")
@@ -111,7 +220,7 @@ def list_files():
                 logger.warning("Database refresh completed with warnings")
                 messagebox.showwarning("Warning", "Database refresh completed with some warnings. Check the log for details.")
         except Exception as e:
-            logger.error(f"Database refresh failed: {str(e)}", exc_info=True)
+            logger.error("Database refresh failed: %s", e, exc_info=True)
             messagebox.showerror("Error", f"Failed to refresh database: {str(e)}")
 
     # Create buttons frame
@@ -121,7 +230,7 @@ def list_files():
     refresh_button = tk.Button(button_frame, text="Refresh All", command=refresh_database, font=("Arial", 10))
     refresh_button.pack(side=tk.LEFT, padx=5)
 
-    close_button = tk.Button(button_frame, text="Close", command=file_window.destroy, font=("Arial", 10))
+    close_button = tk.Button(button_frame, text="Close", command=close_window, font=("Arial", 10))
     close_button.pack(side=tk.LEFT, padx=5)
 
     # Bind double-click event to the Listbox for opening files
@@ -142,8 +251,9 @@ def make_analysis_window():
     alias_listbox = tk.Listbox(analysis_window, font=("Arial", 10), width=50, height=15)
     alias_listbox.pack(pady=10)
 
-    for alias in aliases:
-        alias_listbox.insert(tk.END, f"{alias['alias']} -> {alias['value']}")
+    formatted = [f"{alias['alias']} -> {alias['value']}" for alias in aliases]
+    if formatted:
+        alias_listbox.insert(tk.END, *formatted)
 
     close_button = tk.Button(analysis_window, text="Close", command=analysis_window.destroy, font=("Arial", 10))
     close_button.pack(pady=10)
\ No newline at end of file
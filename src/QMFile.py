@@ -2,9 +2,77 @@
 This file contains the Quote Master File class and its associated methods.
 This class is responsible for managing the Quote Master File, including loading, saving, and manipulating the data within it.
 '''
+import hashlib
+import logging
+import os
+import tempfile
 import openpyxl
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
+# Parsed master sheets are cached here as Parquet, keyed by path, mtime and size.
+# PARTS_SANDBOX_CACHE_DIR overrides the location, e.g. to keep tests out of the user's cache
+CACHE_DIR = os.environ.get('PARTS_SANDBOX_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'parts_sandbox'))
+
+# Preferred pandas engine for reading Quote Master Files, openpyxl is used if it isn't installed
+ENGINE = "calamine"
+FALLBACK_ENGINE = "openpyxl"
+
+# Arrow-backed strings keep alias data in contiguous buffers instead of one Python object per cell
+ALIAS_DTYPES = {'alias': 'string[pyarrow]', 'value': 'string[pyarrow]'}
+
+def read_excel(file_path, **options):
+    '''
+    Reads a sheet with pandas using the preferred engine, falling back if it isn't installed.
+    Takes the same keyword arguments as pandas.read_excel.
+    '''
+    try:
+        return pd.read_excel(file_path, engine=ENGINE, **options)
+    except ImportError:
+        return pd.read_excel(file_path, engine=FALLBACK_ENGINE, **options)
+
+def read_master_columns(file_path, columns, dtype=None):
+    '''
+    Reads only the given columns from the master sheet of a Quote Master File.
+    Columns are pruned by the parser, so the rest of the sheet is never materialized.
+    The returned DataFrame is missing whichever of the columns the sheet lacks.
+    Columns come back Arrow-backed, so strings and numbers don't become Python objects per cell.
+    dtype maps columns to the string dtypes they are converted to, as text, once the sheet is parsed.
+    '''
+    df = read_excel(file_path, sheet_name='Master Part List', usecols=lambda column: column in columns,
+                    dtype_backend='pyarrow')
+    # Arrow dtypes given to the parser fail on a column mixing text and numbers,
+    # so the cells are turned into text after parsing instead
+    for column in dtype or ():
+        if column in df.columns:
+            df[column] = column_text(df[column]).astype(dtype[column])
+    return df
+
+def column_text(column):
+    '''
+    Returns a column's cells as text, with blanks left missing.
+    Whole numbers come out as '111' even where blanks made pandas hold them as floats,
+    so the same cell gives the same text however the sheet was read.
+    '''
+    values = column.to_numpy(dtype=object, na_value=None)
+    return pd.Series([None if value is None else cell_text(value) for value in values],
+                     index=column.index, dtype=object)
+
+def cell_text(value):
+    '''
+    Returns the text for a single non-blank cell value.
+    '''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def read_aliases(file_path):
+    '''
+    Reads only the alias and value columns from the master sheet of a Quote Master File.
+    '''
+    return read_master_columns(file_path, ('alias', 'value'), dtype=ALIAS_DTYPES)
+
 class QMFile:
     '''
     This class represents one of many Quote Master Files.
@@ -13,39 +81,136 @@ class QMFile:
     def __init__(self, file_path):
         '''
         Initializes the QMFile object with the given file path.
-        Loads the workbook and initializes the data structure.
+        Loads the master sheet data and initializes the data structure.
+        The workbook itself is only opened if the data has to be parsed with openpyxl.
         '''
-        try:
-            self.file_path = file_path
-            self.workbook = openpyxl.load_workbook(file_path)
-            self.data = self.load_data()
-        except FileNotFoundError:
+        if not os.path.isfile(file_path):
             raise FileNotFoundError(f"File {file_path} not found.")
-            del self
+
+        self.file_path = file_path
+        self.workbook = None
+        self._sheet_by_name = {}
+
+        try:
+            self.parts_df = self.load_data()
+            self.data = {
+                'parts': self.parts_df
+            }
+        except Exception:
+            # read_only workbooks hold the zip file open until closed
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        '''
+        Closes the underlying workbook, if it was opened, and releases its file handle.
+        '''
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
 
     def load_master_sheet(self):
         '''
-        Loads the master sheet from the workbook.
+        Loads the master sheet from the workbook, opening the workbook on first use.
         Returns the master sheet object.
         '''
-        try:
-            return self.workbook['Master Part List']
-        except KeyError:
+        if self.workbook is None:
+            # read_only streams rows instead of building every Cell object, and
+            # data_only returns cached formula results rather than the formulas
+            self.workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True, keep_links=False)
+            self._sheet_by_name = {sheet.title: sheet for sheet in self.workbook.worksheets}
+
+        sheet = self._sheet_by_name.get('Master Part List')
+        if sheet is None:
             raise KeyError("Master Part List sheet not found in the workbook.")
+        return sheet
 
     def load_data(self):
         '''
-        Loads data from the workbook into a structured format.
-        Returns a dictionary containing the parsed data.
+        Loads the master sheet from the Quote Master File into a DataFrame.
+        Unchanged files are served from the Parquet cache instead of being re-parsed.
         '''
         try:
+            cache_path = self.cache_path()
+            try:
+                return pd.read_parquet(cache_path, dtype_backend='pyarrow')
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning("Ignoring unreadable cache %s: %s", cache_path, e)
+
+            # Store columns as typed Arrow arrays rather than object arrays of Python values
+            df = self.parse_master_sheet().convert_dtypes(dtype_backend='pyarrow')
+            self.write_cache(df, cache_path)
+            return df
+        except Exception as e:
+            raise Exception(f"Error loading data: {str(e)}")
+
+    def parse_master_sheet(self):
+        '''
+        Parses the master sheet into a DataFrame.
+        Uses the calamine engine when available, falling back to openpyxl.
+        '''
+        try:
+            return pd.read_excel(self.file_path, sheet_name='Master Part List', engine=ENGINE)
+        except ImportError:
             master_sheet = self.load_master_sheet()
-            df = pd.DataFrame(master_sheet.values)
+            rows = master_sheet.iter_rows(values_only=True)
             # Assuming first row contains headers
-            df.columns = df.iloc[0]
-            df = df.iloc[1:]  # Remove header row from data
-            return {
-                'parts': df.to_dict('records')
-            }
+            headers = next(rows, ())
+            return pd.DataFrame(rows, columns=headers)
+
+    def cache_path(self):
+        '''
+        Returns the Parquet cache path for the current version of the file.
+        Every version of a file shares the prefix from cache_prefix.
+        '''
+        st = os.stat(self.file_path)
+        version = hashlib.blake2b(f"{st.st_mtime_ns}|{st.st_size}".encode(), digest_size=8).hexdigest()
+        return os.path.join(CACHE_DIR, f"{self.cache_prefix()}-{version}.parquet")
+
+    def cache_prefix(self):
+        '''
+        Returns the cache file name prefix shared by every version of the file.
+        '''
+        return hashlib.blake2b(os.path.abspath(self.file_path).encode(), digest_size=16).hexdigest()
+
+    def prune_cache(self, cache_path):
+        '''
+        Removes cached versions of the file other than cache_path, left behind by earlier edits.
+        '''
+        prefix = self.cache_prefix() + '-'
+        keep = os.path.basename(cache_path)
+        with os.scandir(CACHE_DIR) as it:
+            stale = [entry.path for entry in it if entry.name.startswith(prefix) and entry.name != keep]
+        for path in stale:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Could not remove stale cache %s: %s", path, e)
+
+    def write_cache(self, df, cache_path):
+        '''
+        Writes the parsed DataFrame to the Parquet cache.
+        Failing to cache is not fatal, the file is simply parsed again next time.
+        '''
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial cache
+            fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+            os.close(fd)
+            try:
+                df.to_parquet(tmp_path, compression='zstd')
+                os.replace(tmp_path, cache_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self.prune_cache(cache_path)
         except Exception as e:
-            raise Exception(f"Error loading data: {str(e)}")
+            logger.warning("Could not cache %s: %s", self.file_path, e)
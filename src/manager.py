@@ -3,13 +3,80 @@ This file is the Manager for the Parts Sandbox application.
 It is responsible for managing the overall flow of the application, including database operations and request handling.
 '''
 import sqlite3
+import openpyxl
+import numpy as np
 import pandas as pd
 import os
 import logging
-from QMFile import QMFile
+import threading
+import traceback
+from itertools import islice
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from QMFile import ALIAS_DTYPES, read_master_columns
 
 logger = logging.getLogger(__name__)
 
+# Master Part List columns stored in the database during a refresh
+ALIAS_COLUMNS = ['alias', 'value']
+PART_COLUMNS = ['Part Number', 'EAU']
+
+# Default page size for search_parts, best matches first
+SEARCH_LIMIT = 50
+
+# Number of distinct search terms whose results are kept in memory
+SEARCH_CACHE_SIZE = 256
+
+# Rows bound per executemany call for bulk inserts; all batches share one transaction
+INSERT_BATCH_SIZE = 10_000
+
+# Upper bound on processes used to parse Quote Master files during a refresh
+MAX_REFRESH_WORKERS = 8
+
+def extract_master_data(file):
+    '''
+    Loads a single Quote Master file and returns its (aliases, parts, error).
+    aliases or parts is None if the file lacks the columns for it. If the file could not be
+    processed both are None and error is the formatted traceback, otherwise error is None.
+    Kept at module level so refresh_all_files can run it in worker processes. Workers
+    don't share the application's logging setup, so problems are returned rather than logged.
+    '''
+    try:
+        df = read_master_columns(file, ALIAS_COLUMNS + PART_COLUMNS, dtype=ALIAS_DTYPES)
+    except Exception:
+        return None, None, traceback.format_exc()
+
+    parts_from_file = None
+    if all(column in df.columns for column in PART_COLUMNS):
+        parts_from_file = df[PART_COLUMNS]
+
+    aliases_from_file = None
+    if all(column in df.columns for column in ALIAS_COLUMNS):
+        aliases_from_file = df[ALIAS_COLUMNS]
+
+    return aliases_from_file, parts_from_file, None
+
+# Keeps the full-text index in step with inserts into aliases.
+# insert_aliases drops and recreates it around a first load.
+ALIASES_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS aliases_ai AFTER INSERT ON aliases BEGIN
+        INSERT INTO aliases_fts(rowid, alias, value) VALUES (new.rowid, new.alias, new.value);
+    END
+'''
+
+def executemany_in_batches(conn, sql, rows):
+    '''
+    Runs sql once per row like executemany, INSERT_BATCH_SIZE rows at a time.
+    This keeps memory bounded for large inserts without splitting the caller's transaction.
+    Returns the total number of rows changed.
+    '''
+    rows = iter(rows)
+    changed = 0
+    while batch := list(islice(rows, INSERT_BATCH_SIZE)):
+        changed += conn.executemany(sql, batch).rowcount
+    return changed
+
 class ApplicationManager:
     '''
     This class is the manager for the Parts Sandbox application.
@@ -22,35 +89,106 @@ class ApplicationManager:
         self.db_path = 'database/parts_sandbox.db'
         self.excel_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'excels'))
         self._conn = None
+        # (excel_path, directory mtime_ns, file names) from the last Quote Master listing
+        self._qm_cache = None
+        # The connection is shared between threads, so only one may use it at a time
+        self._lock = threading.RLock()
+        # How many get_connection blocks are open; nested ones share the outermost transaction
+        self._depth = 0
+        # Search results by term, cleared by get_connection whenever a transaction changes rows
+        self._cached_search = lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._query_parts)
+        # PRAGMA data_version when the search cache was last checked, which changes when
+        # another connection commits
+        self._data_version = None
         self.start()
 
     @contextmanager
     def get_connection(self):
-        """Get a database connection within a context"""
-        if ':memory:' in self.db_path:
-            # For in-memory database, maintain the same connection
+        """Get the shared database connection within a context.
+        Nested blocks join the outermost one, which commits or rolls back everything once."""
+        with self._lock:
             if self._conn is None:
-                self._conn = sqlite3.connect(self.db_path)
+                # One connection is opened per manager and reused, so the tables are only set up once
+                # Writes open with BEGIN IMMEDIATE, taking the write lock up front rather than
+                # failing with "database is locked" when a read transaction tries to upgrade
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level='IMMEDIATE')
                 self._init_db(self._conn)
-            yield self._conn
-        else:
-            # For file-based database, create new connection each time
-            conn = sqlite3.connect(self.db_path)
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self._conn
+                finally:
+                    self._depth -= 1
+                return
+
+            changes = self._conn.total_changes
+            self._depth = 1
             try:
-                yield conn
-                conn.commit()
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
             finally:
-                conn.close()
+                self._depth = 0
+                if self._conn.total_changes != changes:
+                    self._cached_search.cache_clear()
 
     def _init_db(self, conn):
-        """Initialize database tables"""
+        """Initialize database settings and tables"""
         cursor = conn.cursor()
+        # WAL with synchronous=NORMAL only fsyncs at checkpoints instead of on every commit
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA cache_size=-65536')  # 64MB
+        cursor.execute('PRAGMA mmap_size=268435456')  # 256MB
+        # INSERT OR REPLACE only fires delete triggers with recursive triggers on,
+        # which the full-text index below relies on to stay in sync
+        cursor.execute('PRAGMA recursive_triggers=ON')
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS aliases (
                 alias TEXT PRIMARY KEY,
                 value TEXT NOT NULL
             )
         ''')
+        # Staging table for alias merges. TEMP tables are per connection and live in
+        # memory (temp_store=MEMORY), so refilling them never touches the database file
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS temp_aliases (
+                alias TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'aliases_fts'")
+        fts_exists = cursor.fetchone() is not None
+        # Trigram full-text index over aliases, so substring searches don't scan the table
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS aliases_fts USING fts5(
+                alias, value, content='aliases', content_rowid='rowid', tokenize='trigram'
+            )
+        ''')
+        cursor.execute(ALIASES_INSERT_TRIGGER)
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS aliases_ad AFTER DELETE ON aliases BEGIN
+                INSERT INTO aliases_fts(aliases_fts, rowid, alias, value) VALUES ('delete', old.rowid, old.alias, old.value);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS aliases_au AFTER UPDATE ON aliases BEGIN
+                INSERT INTO aliases_fts(aliases_fts, rowid, alias, value) VALUES ('delete', old.rowid, old.alias, old.value);
+                INSERT INTO aliases_fts(rowid, alias, value) VALUES (new.rowid, new.alias, new.value);
+            END
+        ''')
+        if not fts_exists:
+            # Index any aliases stored before the full-text table existed
+            cursor.execute("INSERT INTO aliases_fts(aliases_fts) VALUES ('rebuild')")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS parts (
+                part_number TEXT PRIMARY KEY,
+                eau REAL
+            )
+        ''')
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS quote_masters (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -72,10 +210,9 @@ class ApplicationManager:
         Checks for the database file.
         If it does not exist, it creates a new one with necessary tables.
         '''
-        try:
-            logger.info("Checking for parts_sandbox.xlsx")
-            self.workbook = openpyxl.load_workbook(r'excels/parts_sandbox.xlsx')
-        except FileNotFoundError:
+        logger.info("Checking for parts_sandbox.xlsx")
+        # Only the file's existence matters here, so it isn't parsed
+        if not os.path.isfile(r'excels/parts_sandbox.xlsx'):
             logger.info("Database file not found. Creating a new one.")
             workbook = openpyxl.Workbook()
             workbook.save(r'excels/parts_sandbox.xlsx')
@@ -85,29 +222,20 @@ class ApplicationManager:
         Updates the alias in the database from an Excel file.
         '''
         try:
-            logger.info(f"Updating aliases from file: {file_path}")
-            df = pd.read_excel(file_path, sheet_name='Master Part List')
+            logger.info("Updating aliases from file: %s", file_path)
+            # Only the columns stored in the database are parsed; the check below sees which are present
+            df = read_master_columns(file_path, ALIAS_COLUMNS + PART_COLUMNS, dtype=ALIAS_DTYPES)
             
             if 'alias' in df.columns and 'value' in df.columns:
+                # Rows are bound straight into aliases in one transaction; later rows
+                # replace earlier ones, so the file's last value for an alias wins
+                # Parts are written in the same transaction, so a failure leaves neither behind
+                rows = df[ALIAS_COLUMNS].dropna().astype(str).itertuples(index=False, name=None)
                 with self.get_connection() as conn:
-                    # Create temporary table for new aliases
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        CREATE TABLE IF NOT EXISTS temp_aliases (
-                            alias TEXT PRIMARY KEY,
-                            value TEXT NOT NULL
-                        )
-                    ''')
-                    
-                    # Convert DataFrame to SQL
-                    alias_data = df[['alias', 'value']].copy()
-                    alias_data.to_sql('temp_aliases', conn, if_exists='replace', index=False)
-                    
-                    # Merge new aliases with existing ones
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO aliases (alias, value)
-                        SELECT alias, value FROM temp_aliases
-                    ''')
+                    executemany_in_batches(conn, 'INSERT OR REPLACE INTO aliases (alias, value) VALUES (?, ?)', rows)
+
+                    if all(column in df.columns for column in PART_COLUMNS):
+                        self.update_parts(df)
                     
                 logger.info("Successfully updated aliases")
                 return True
@@ -116,7 +244,7 @@ class ApplicationManager:
                 return False
                 
         except Exception as e:
-            logger.error(f"Error updating aliases: {str(e)}")
+            logger.error("Error updating aliases: %s", e)
             return False
 
     def get_quote_master_files(self):
@@ -124,55 +252,184 @@ class ApplicationManager:
         Returns a list of all Quote Master files in the excel directory
         '''
         try:
-            files = [
-                file for file in os.listdir(self.excel_path)
-                if os.path.isfile(os.path.join(self.excel_path, file)) 
-                and file.endswith('.xlsx')
-                and file != "parts_sandbox.xlsx"
-            ]
-            logger.info(f"Found {len(files)} quote master files")
+            # Only rescan when the directory has changed since the last listing
+            mtime = os.stat(self.excel_path).st_mtime_ns
+            if self._qm_cache is not None and self._qm_cache[:2] == (self.excel_path, mtime):
+                return list(self._qm_cache[2])
+
+            with os.scandir(self.excel_path) as it:
+                files = [
+                    entry.name for entry in it
+                    if entry.is_file(follow_symlinks=False)
+                    and entry.name.endswith('.xlsx')
+                    and entry.name != "parts_sandbox.xlsx"
+                ]
+            self._qm_cache = (self.excel_path, mtime, files)
+            logger.info("Found %d quote master files", len(files))
             return files
         except Exception as e:
-            logger.error(f"Error listing files: {str(e)}")
+            logger.error("Error listing files: %s", e)
             return []
 
-    def search_parts(self, search_term):
+    def search_parts(self, search_term, limit=SEARCH_LIMIT, offset=0):
         '''
         Searches for parts in the database matching the search term
+        Returns at most limit results, skipping the first offset of them.
+        A limit of None returns every match.
         '''
         try:
-            logger.info(f"Searching for parts with term: {search_term}")
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Search in aliases table
-                cursor.execute('''
-                    SELECT * FROM aliases 
-                    WHERE alias LIKE ? OR value LIKE ?
-                ''', (f'%{search_term}%', f'%{search_term}%'))
-                
-                results = cursor.fetchall()
-                logger.info(f"Found {len(results)} matching parts")
-                
-                return [{'alias': row[0], 'value': row[1]} for row in results]
+            logger.info("Searching for parts with term: %s", search_term)
+            # SQLite treats a negative LIMIT as no limit
+            limit = -1 if limit is None else int(limit)
+            with self._lock:
+                self._sync_search_cache()
+                results = self._cached_search(str(search_term), limit, int(offset))
+            logger.info("Found %d matching parts", len(results))
+            
+            # Fresh dicts per call, so callers can't modify the cached rows
+            return [dict(row) for row in results]
         except Exception as e:
-            logger.error(f"Error searching parts: {str(e)}")
+            logger.error("Error searching parts: %s", e)
             return []
 
+    def _sync_search_cache(self):
+        '''
+        Clears the search cache if another connection has committed to the database since the last check.
+        Writes through this manager's own connection clear it in get_connection instead.
+        '''
+        with self.get_connection() as conn:
+            version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._cached_search.cache_clear()
+
+    def _query_parts(self, search_term, limit, offset):
+        '''
+        Runs the search for search_parts and returns the matching rows as a tuple of sqlite3.Row.
+        Called through the per-manager LRU cache, so repeated terms skip the query.
+        '''
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # Rows are keyed by column name in C, so no dict is built per row here
+            cursor.row_factory = sqlite3.Row
+            
+            if len(search_term) >= 3:
+                # Quoted as a phrase, so the term is matched as a substring rather than parsed as a query
+                phrase = '"' + search_term.replace('"', '""') + '"'
+                cursor.execute('''
+                    SELECT alias, value FROM aliases_fts
+                    WHERE aliases_fts MATCH ?
+                    ORDER BY bm25(aliases_fts)
+                    LIMIT ? OFFSET ?
+                ''', (phrase, limit, offset))
+            else:
+                # Trigrams need at least three characters, so shorter terms scan the aliases table
+                cursor.execute('''
+                    SELECT alias, value FROM aliases 
+                    WHERE alias LIKE ? OR value LIKE ?
+                    ORDER BY rowid
+                    LIMIT ? OFFSET ?
+                ''', (f'%{search_term}%', f'%{search_term}%', limit, offset))
+            
+            return tuple(cursor.fetchall())
+
     def get_eau_forecast(self, part_number):
         '''
         Gets EAU forecast for a specific part number from the database
+        Returns None if the part number is not known.
         '''
         try:
-            logger.info(f'Loading workbook at {file_path}')
-            workbook = openpyxl.load_workbook(file_path)
-            sheet = workbook['Master Part List']
+            logger.info("Looking up EAU for part: %s", part_number)
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT eau FROM parts WHERE part_number = ?', (str(part_number),))
+                row = cursor.fetchone()
+
+            if row is None:
+                logger.warning("No EAU found for part: %s", part_number)
+                return None
+            return {'part_number': part_number, 'eau': row[0]}
+        except Exception as e:
+            logger.error("Error getting EAU forecast: %s", e)
+            return None
+
+    def update_parts(self, parts):
+        '''
+        Stores Part Number -> EAU from a Master Part List DataFrame in the parts table.
+        Later rows replace earlier ones for the same part number.
+        '''
+        parts = parts.dropna(subset=['Part Number'])
+        part_numbers = parts['Part Number'].astype(str)
+        # Arrow-backed columns mark blanks as <NA>, which float() rejects, so they become NaN here
+        eau = pd.to_numeric(parts['EAU'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        # sqlite3 can't bind NaN, so hand it Python floats and None
+        eau = [None if np.isnan(value) else float(value) for value in eau]
 
-            #Make a dataframe of the sheet
-            df = pd.DataFrame(sheet.values)
-            logger.debug(df.head())
-        except FileNotFoundError:
-            raise FileNotFoundError(f"File {file_path} not found.")
+        with self.get_connection() as conn:
+            executemany_in_batches(
+                conn,
+                'INSERT OR REPLACE INTO parts (part_number, eau) VALUES (?, ?)',
+                zip(part_numbers, eau)
+            )
+
+    def _stage_aliases(self, cursor, aliases):
+        '''
+        Refills the temp_aliases staging table from an alias/value DataFrame.
+        The first row wins for an alias repeated in the frame.
+        Rows missing either column are skipped, since aliases.value is NOT NULL.
+        '''
+        rows = aliases[ALIAS_COLUMNS].dropna().astype(str).itertuples(index=False, name=None)
+        cursor.execute('DELETE FROM temp_aliases')
+        cursor.executemany('INSERT OR IGNORE INTO temp_aliases (alias, value) VALUES (?, ?)', rows)
+
+    def merge_aliases(self, alias_frames):
+        '''
+        Merges alias/value DataFrames into the aliases table, in order.
+        An alias already in the table, or in an earlier frame, is kept in case of conflict.
+        Returns the full aliases table as a DataFrame.
+        '''
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for aliases in alias_frames:
+                self._stage_aliases(cursor, aliases)
+                # The primary key on aliases.alias does the de-duplication
+                cursor.execute('''
+                    INSERT OR IGNORE INTO aliases (alias, value)
+                    SELECT alias, value FROM temp_aliases
+                ''')
+            return pd.read_sql_query('SELECT alias, value FROM aliases', conn)
+
+    def insert_aliases(self, pairs):
+        '''
+        Inserts (alias, value) pairs into the aliases table in one transaction.
+        An alias already in the table, or earlier in pairs, is kept in case of conflict.
+        Returns the number of aliases added.
+        '''
+        with self.get_connection() as conn:
+            # DDL doesn't open a transaction on its own, so start one to keep the trigger swap atomic
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            # Loading into an empty table, the full-text index is built once at the end
+            # rather than row by row through the insert trigger
+            first_load = conn.execute('SELECT NOT EXISTS (SELECT 1 FROM aliases)').fetchone()[0]
+            if first_load:
+                conn.execute('DROP TRIGGER IF EXISTS aliases_ai')
+
+            # The primary key on aliases.alias does the de-duplication
+            added = executemany_in_batches(conn, 'INSERT OR IGNORE INTO aliases (alias, value) VALUES (?, ?)', pairs)
+
+            if first_load:
+                conn.execute("INSERT INTO aliases_fts(aliases_fts) VALUES ('rebuild')")
+                conn.execute(ALIASES_INSERT_TRIGGER)
+            return added
+
+    def export_aliases(self, aliases, sandbox_path):
+        '''
+        Writes the aliases to the sandbox workbook as an export of the database.
+        The workbook is rewritten from scratch with xlsxwriter rather than appended to with openpyxl.
+        '''
+        with pd.ExcelWriter(sandbox_path, engine='xlsxwriter') as writer:
+            aliases.to_excel(writer, sheet_name='aliases', index=False)
 
     def refresh_all_files(self):
         """
@@ -182,79 +439,59 @@ class ApplicationManager:
         """
         try:
             logger.info("Starting database refresh")
-            excel_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'excels'))
-            sandbox_path = os.path.join(excel_folder, 'parts_sandbox.xlsx')
             
             # Get list of Quote Master files
-            files = [
-                os.path.join(excel_folder, f) 
-                for f in os.listdir(excel_folder) 
-                if f.endswith('.xlsx') and f != "parts_sandbox.xlsx"
-            ]
+            with os.scandir(self.excel_path) as it:
+                files = [
+                    entry.path for entry in it
+                    if entry.name.endswith('.xlsx') and entry.name != "parts_sandbox.xlsx"
+                ]
             
             if not files:
                 logger.warning("No Quote Master files found")
                 return False
                 
-            # Load or create aliases sheet
-            try:
-                existing_aliases = pd.read_excel(sandbox_path, sheet_name='aliases')
-                logger.debug("Loaded existing aliases sheet")
-            except (FileNotFoundError, KeyError):
-                existing_aliases = pd.DataFrame(columns=['alias', 'value'])
-                logger.info("Created new aliases sheet")
-            
-            had_warnings = False
-            all_aliases = []
-            
-            # Process each file
-            for file in files:
-                try:
-                    logger.debug(f"Processing file: {file}")
-                    qm_file = QMFile(file)
-                    master_sheet = qm_file.load_master_sheet()
-                    df = pd.DataFrame(master_sheet.values)
-                    
-                    # Skip header row and get alias/value columns
-                    df.columns = df.iloc[0]
-                    df = df.iloc[1:]
-                    
-                    if 'alias' in df.columns and 'value' in df.columns:
-                        aliases_from_file = df[['alias', 'value']].copy()
-                        all_aliases.append(aliases_from_file)
-                        logger.debug(f"Successfully processed {len(aliases_from_file)} aliases from {file}")
-                    else:
-                        logger.warning(f"File {file} missing required columns")
-                        had_warnings = True
-                        
-                except Exception as e:
-                    logger.error(f"Error processing {file}: {str(e)}", exc_info=True)
-                    had_warnings = True
-                    continue
-                finally:
-                    if hasattr(qm_file, 'workbook'):
-                        qm_file.workbook.close()
-            
-            if all_aliases:
-                # Combine all new aliases
-                new_aliases = pd.concat(all_aliases, ignore_index=True)
-                new_aliases = new_aliases.drop_duplicates(subset=['alias'], keep='first')
-                
-                # Merge with existing aliases, keeping existing ones in case of conflict
-                combined_aliases = pd.concat([existing_aliases, new_aliases], ignore_index=True)
-                combined_aliases = combined_aliases.drop_duplicates(subset=['alias'], keep='first')
-                
-                # Save back to parts_sandbox.xlsx
-                with pd.ExcelWriter(sandbox_path, engine='openpyxl', mode='a') as writer:
-                    combined_aliases.to_excel(writer, sheet_name='aliases', index=False)
+            # Parsing is CPU bound and independent per file, so each workbook is parsed in
+            # its own process. One core is left for the UI.
+            max_workers = max(1, min(MAX_REFRESH_WORKERS, (os.cpu_count() or 2) - 1, len(files)))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(extract_master_data, files))
+
+            # Alias rows from every file are gathered into one list of (alias, value) tuples,
+            # in file order, rather than kept as one DataFrame per file
+            all_pairs = []
+            all_parts = []
+            alias_files = 0
+            for file, (aliases, parts, error) in zip(files, results):
+                if error is not None:
+                    logger.error("Error processing %s:\n%s", file, error)
+                elif aliases is None:
+                    logger.warning("File %s missing required columns", file)
+                else:
+                    logger.debug("Successfully processed %d aliases from %s", len(aliases), file)
+                    alias_files += 1
+                    all_pairs.extend(aliases[ALIAS_COLUMNS].dropna().astype(str).itertuples(index=False, name=None))
+                if parts is not None:
+                    all_parts.append(parts)
+            had_warnings = alias_files < len(files)
+
+            # Parts and aliases are written in one transaction, so a refresh is all or nothing
+            with self.get_connection():
+                # Part Number -> EAU is kept in the database so forecasts don't re-read the workbooks.
+                # Files are concatenated in order, so later files win for a repeated part number
+                if all_parts:
+                    self.update_parts(pd.concat(all_parts, ignore_index=True))
                 
-                logger.info(f"Successfully saved {len(combined_aliases)} aliases to database")
+                # Aliases already in the table are kept in case of conflict, so the existing
+                # ones don't need to be read back in. The table is the store of record,
+                # so the sandbox workbook is neither read nor rewritten
+                added = self.insert_aliases(all_pairs) if all_pairs else 0
+            
+            if all_pairs:
+                logger.info("Successfully saved %d new aliases to database", added)
             
             return not had_warnings
             
         except Exception as e:
             logger.error("Critical error during refresh", exc_info=True)
-            raise Exception(f"Error preparing master file: {str(e)}")
-        finally:
-            if hasattr(self, 'workbook'):
-                self.workbook.close()
\ No newline at end of file
+            raise Exception(f"Error preparing master file: {str(e)}")
\ No newline at end of file
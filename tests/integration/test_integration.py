@@ -54,8 +54,11 @@ def test_env():
     # Cleanup
     shutil.rmtree(temp_dir)
 
-def test_end_to_end_quote_master_flow(test_env):
+def test_end_to_end_quote_master_flow(test_env, monkeypatch):
     """Test the complete flow of loading and processing a Quote Master file"""
+    # Keep the parsed-sheet cache inside the test environment
+    monkeypatch.setattr('src.QMFile.CACHE_DIR', os.path.join(test_env['temp_dir'], 'cache'))
+    
     # Initialize ApplicationManager with test environment
     app_manager = ApplicationManager()
     app_manager.db_path = os.path.join(test_env['db_dir'], 'test.db')
@@ -7,7 +7,7 @@ import os
 import sqlite3
 import pandas as pd
 from unittest.mock import Mock, patch, PropertyMock
-from src.manager import ApplicationManager
+from src.manager import ApplicationManager, extract_master_data
 
 @pytest.fixture(autouse=True)
 def app_manager():
@@ -84,4 +84,171 @@ def test_get_quote_master_files(app_manager, tmp_path):
     with patch.object(app_manager, 'excel_path', str(test_dir)):
         files = app_manager.get_quote_master_files()
         assert len(files) == 1, "Should only return non-parts_sandbox xlsx files"
-        assert "test_quote.xlsx" in files
\ No newline at end of file
+        assert "test_quote.xlsx" in files
+
+
+def test_merge_aliases_keeps_existing(app_manager):
+    """Test that merging aliases keeps the first value seen for each alias"""
+    with app_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM aliases")
+        cursor.execute("INSERT INTO aliases (alias, value) VALUES (?, ?)",
+                      ("existing_part", "OLD123"))
+
+    first = pd.DataFrame({'alias': ['existing_part', 'new_part'], 'value': ['NEW123', 'NEW456']})
+    second = pd.DataFrame({'alias': ['new_part', None], 'value': ['NEW789', 'NULL000']})
+
+    combined = app_manager.merge_aliases([first, second])
+    values = dict(zip(combined['alias'], combined['value']))
+    assert values == {'existing_part': 'OLD123', 'new_part': 'NEW456'}
+
+
+def test_get_eau_forecast(app_manager):
+    """Test EAU lookup from the parts table"""
+    parts = pd.DataFrame({
+        'Part Number': ['TEST001', 'TEST002', None],
+        'EAU': [100, 'unknown', 300]
+    })
+    app_manager.update_parts(parts)
+
+    assert app_manager.get_eau_forecast('TEST001')['eau'] == 100
+    assert app_manager.get_eau_forecast('TEST002')['eau'] is None
+    assert app_manager.get_eau_forecast('MISSING') is None
+
+
+def test_extract_master_data_mixed_alias_column(tmp_path):
+    """Test that alias and value columns mixing text and numbers are read as text"""
+    file = tmp_path / "mixed.xlsx"
+    pd.DataFrame({
+        'Part Number': ['P1', 'P2', 'P3'],
+        'EAU': [10, 20, 30],
+        'alias': ['x', 12345, 'y'],
+        'value': ['V1', 'V2', 67890]
+    }).to_excel(file, sheet_name='Master Part List', index=False)
+
+    aliases, parts, error = extract_master_data(str(file))
+    assert error is None
+    assert list(aliases['alias']) == ['x', '12345', 'y']
+    assert list(aliases['value']) == ['V1', 'V2', '67890']
+    assert len(parts) == 3
+
+
+def test_search_cache_sees_other_connections(tmp_path):
+    """Test that cached search results are dropped after another connection commits"""
+    manager = ApplicationManager()
+    manager.db_path = str(tmp_path / "search.db")
+    manager.insert_aliases([("abc_part", "ABC1")])
+    assert [row['alias'] for row in manager.search_parts("abc")] == ["abc_part"]
+
+    other = sqlite3.connect(manager.db_path)
+    other.execute("INSERT INTO aliases (alias, value) VALUES (?, ?)", ("abc_other", "ABC2"))
+    other.commit()
+    other.close()
+
+    results = manager.search_parts("abc")
+    assert {row['alias'] for row in results} == {"abc_part", "abc_other"}
+
+
+def has_insert_trigger(manager):
+    """Returns whether the trigger that indexes inserted aliases exists"""
+    with manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='aliases_ai'")
+        return cursor.fetchone() is not None
+
+
+def test_insert_aliases_first_load(app_manager):
+    """Test that a first load into an empty table is indexed and the trigger is restored"""
+    added = app_manager.insert_aliases([("first_part", "FIRST1"), ("first_part", "DUP"), ("second_part", "SECOND2")])
+    assert added == 2
+
+    assert app_manager.search_parts("first_part") == [{'alias': "first_part", 'value': "FIRST1"}]
+    assert app_manager.search_parts("SECOND2") == [{'alias': "second_part", 'value': "SECOND2"}]
+    assert has_insert_trigger(app_manager)
+
+
+def test_insert_aliases_incremental_load(app_manager):
+    """Test that a load into a non-empty table is indexed through the trigger"""
+    app_manager.insert_aliases([("first_part", "FIRST1")])
+    app_manager.insert_aliases([("later_part", "LATER1")])
+
+    assert app_manager.search_parts("later_part") == [{'alias': "later_part", 'value': "LATER1"}]
+    assert has_insert_trigger(app_manager)
+
+
+def test_insert_aliases_failed_load_rolls_back(app_manager):
+    """Test that a failed first load leaves the table empty and the trigger in place"""
+    def pairs():
+        yield ("lost_part", "LOST1")
+        raise RuntimeError("read failed")
+
+    with pytest.raises(RuntimeError):
+        app_manager.insert_aliases(pairs())
+
+    with app_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM aliases")
+        assert cursor.fetchone()[0] == 0
+    assert has_insert_trigger(app_manager)
+
+
+def test_refresh_all_files(app_manager, tmp_path):
+    """Test refreshing the database from a folder of Quote Master files"""
+    pd.DataFrame({
+        'Part Number': ['P1', 'P2'],
+        'EAU': [100, 200],
+        'alias': ['refresh_a', 'refresh_b'],
+        'value': ['RA1', 'RB1']
+    }).to_excel(tmp_path / "qm1.xlsx", sheet_name='Master Part List', index=False)
+    app_manager.excel_path = str(tmp_path)
+
+    assert app_manager.refresh_all_files() is True
+    assert app_manager.search_parts("refresh_a") == [{'alias': 'refresh_a', 'value': 'RA1'}]
+    assert app_manager.get_eau_forecast('P2')['eau'] == 200
+
+    # A file without alias columns still adds its parts, but the refresh reports a warning
+    pd.DataFrame({
+        'Part Number': ['P3'],
+        'EAU': [300]
+    }).to_excel(tmp_path / "qm2.xlsx", sheet_name='Master Part List', index=False)
+
+    assert app_manager.refresh_all_files() is False
+    assert app_manager.get_eau_forecast('P3')['eau'] == 300
+    assert len(app_manager.search_parts("refresh")) == 2
+
+
+def test_update_alias_blank_eau(app_manager, tmp_path):
+    """Test that a blank EAU cell is stored as unknown rather than failing the update"""
+    file = tmp_path / "blank_eau.xlsx"
+    pd.DataFrame({
+        'Part Number': ['P1', 'P2'],
+        'EAU': [100, None],
+        'alias': ['blank_a', 'blank_b'],
+        'value': ['BA1', 'BB1']
+    }).to_excel(file, sheet_name='Master Part List', index=False)
+
+    assert app_manager.update_alias(str(file)) is True
+    assert app_manager.get_eau_forecast('P1')['eau'] == 100
+    assert app_manager.get_eau_forecast('P2')['eau'] is None
+
+
+def test_numeric_alias_column_with_blank(app_manager, tmp_path):
+    """Test that refresh and update_alias store the same text for a numeric alias column with blanks"""
+    file = tmp_path / "numeric.xlsx"
+    pd.DataFrame({
+        'Part Number': ['P1', 'P2', 'P3'],
+        'EAU': [10, 20, 30],
+        'alias': [111, None, 333],
+        'value': [444, 555, None]
+    }).to_excel(file, sheet_name='Master Part List', index=False)
+
+    aliases, _, error = extract_master_data(str(file))
+    assert error is None
+    assert list(aliases.dropna()['alias']) == ['111']
+    assert list(aliases.dropna()['value']) == ['444']
+
+    assert app_manager.update_alias(str(file)) is True
+    with app_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT alias, value FROM aliases")
+        assert cursor.fetchall() == [('111', '444')]